@@ -0,0 +1 @@
+__all__ = ["devices", "diagnostics", "organizations", "product_firmware"]
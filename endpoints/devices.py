@@ -1,7 +1,47 @@
+import asyncio
 import re
-from typing import Any, Dict, List, Union
-
-from helpers.api_helpers import make_api_request
+import time
+from collections import defaultdict, deque
+from contextlib import aclosing
+from typing import (
+    Any,
+    AsyncIterator,
+    DefaultDict,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from rapidfuzz import fuzz, process, utils
+
+from helpers.api_helpers import invalidate, make_api_request
+
+# Device updates queued within this window (seconds) are sent as a single PUT
+_UPDATE_BATCH_INTERVAL = 0.01
+_pending_updates: DefaultDict[str, Dict[str, Any]] = defaultdict(dict)
+_pending_flushes: Dict[str, asyncio.Task] = {}
+
+_WORD_RE = re.compile(r"\w+")
+
+# Words ignored when matching search terms against device names
+_COMMON_WORDS = frozenset(
+    {
+        "device",
+        "in",
+        "project",
+        "the",
+        "a",
+        "an",
+        "and",
+        "or",
+        "of",
+        "for",
+        "with",
+    }
+)
 
 
 async def list_devices() -> Dict[str, Any]:
@@ -26,6 +66,65 @@ async def list_product_devices(
     )
 
 
+async def update_device(
+    device_id: str, *, name: Optional[str] = None, notes: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Update a device's name and/or notes in a single request.
+
+    Updates to the same device made within a few milliseconds of each other are
+    merged into one PUT, and every caller receives that request's response.
+
+    Args:
+        device_id: The ID of the device to update
+        name: The new name for the device (optional)
+        notes: The notes to add to the device (optional)
+    """
+    fields = {}
+    if name is not None:
+        fields["name"] = name
+    if notes is not None:
+        fields["notes"] = notes
+
+    if not fields:
+        return {"error": "No fields to update. Provide a name and/or notes."}
+
+    flush = _pending_flushes.get(device_id)
+    if flush is not None and flush.done():
+        # Cancelled before it ran, so its cleanup never happened
+        del _pending_flushes[device_id]
+        _pending_updates.pop(device_id, None)
+        flush = None
+
+    _pending_updates[device_id].update(fields)
+
+    if flush is None:
+        flush = asyncio.create_task(_flush_device_update(device_id))
+        _pending_flushes[device_id] = flush
+
+    # Shield the shared flush so one cancelled caller doesn't cancel it for the rest
+    return await asyncio.shield(flush)
+
+
+async def _flush_device_update(device_id: str) -> Dict[str, Any]:
+    """Send the merged pending update for a device after the batch interval."""
+    try:
+        await asyncio.sleep(_UPDATE_BATCH_INTERVAL)
+    finally:
+        # Detach even if cancelled, so later updates start a fresh flush
+        _pending_flushes.pop(device_id, None)
+        json_data = _pending_updates.pop(device_id, {})
+
+    response = await make_api_request(
+        "put", f"/v1/devices/{device_id}", json_data=json_data
+    )
+    # Product device listings show the same names and notes
+    invalidate("/v1/devices")
+    invalidate("/v1/products/")
+    _device_index.invalidate()
+    return response
+
+
 async def rename_device(device_id: str, name: str) -> Dict[str, Any]:
     """
     Rename a device.
@@ -34,9 +133,7 @@ async def rename_device(device_id: str, name: str) -> Dict[str, Any]:
         device_id: The ID of the device to rename
         name: The new name for the device
     """
-    return await make_api_request(
-        "put", f"/v1/devices/{device_id}", json_data={"name": name}
-    )
+    return await update_device(device_id, name=name)
 
 
 async def add_device_notes(device_id: str, notes: str) -> Dict[str, Any]:
@@ -47,9 +144,7 @@ async def add_device_notes(device_id: str, notes: str) -> Dict[str, Any]:
         device_id: The ID of the device
         notes: The notes to add to the device
     """
-    return await make_api_request(
-        "put", f"/v1/devices/{device_id}", json_data={"notes": notes}
-    )
+    return await update_device(device_id, notes=notes)
 
 
 async def ping_device(device_id: str) -> Dict[str, Any]:
@@ -59,7 +154,10 @@ async def ping_device(device_id: str) -> Dict[str, Any]:
     Args:
         device_id: The ID of the device to ping
     """
-    return await make_api_request("put", f"/v1/devices/{device_id}/ping")
+    response = await make_api_request("put", f"/v1/devices/{device_id}/ping")
+    invalidate("/v1/devices")
+    invalidate("/v1/products/")
+    return response
 
 
 async def call_function(
@@ -73,78 +171,283 @@ async def call_function(
         function_name: The name of the function to call
         argument: Argument to pass to the function (optional)
     """
-    return await make_api_request(
+    response = await make_api_request(
         "post", f"/v1/devices/{device_id}/{function_name}", json_data={"arg": argument}
     )
+    invalidate(f"/v1/devices/{device_id}")
+    return response
 
 
-def _fuzzy_match_score(search_terms: str, device_name: str) -> float:
+def _prepare_search_terms(search_terms: str) -> Tuple[str, str]:
     """
-    Calculate a fuzzy match score between search terms and device name.
+    Preprocess search terms once so they can be scored against many devices.
 
     Args:
         search_terms: The search string (e.g., "device 47 in lccmr project")
-        device_name: The actual device name (e.g., "LCCMR_47")
 
     Returns:
-        Float score between 0-1, where 1 is perfect match
+        Tuple of the lowercased search terms and the query with common words removed,
+        normalized with RapidFuzz's default_process
     """
     search_lower = search_terms.lower()
-    name_lower = device_name.lower()
-
-    # Extract words from search terms, filtering out common words
-    common_words = {
-        "device",
-        "in",
-        "project",
-        "the",
-        "a",
-        "an",
-        "and",
-        "or",
-        "of",
-        "for",
-        "with",
-    }
     search_words = [
-        word for word in re.findall(r"\w+", search_lower) if word not in common_words
+        word for word in _WORD_RE.findall(search_lower) if word not in _COMMON_WORDS
     ]
+    return search_lower, utils.default_process(" ".join(search_words))
+
+
+def _match_score(query: str, name: str, **kwargs: Any) -> float:
+    """
+    Score a processed search query against a processed device name.
 
-    if not search_words:
+    A query word counts as matched when it appears anywhere in the name, so prefixes
+    and substrings like "guad" still find "Guadalupe_Station_01". Otherwise
+    RapidFuzz's token set ratio scores the pair, which tolerates typos.
+
+    Args:
+        query: The search query, lowercased with separators normalized
+        name: The device name, lowercased with separators normalized
+
+    Returns:
+        Float score between 0-100, where 100 is perfect match
+    """
+    words = query.split()
+    if not words:
         return 0.0
 
-    score = 0.0
-    max_possible_score = len(search_words)
+    substring_score = 100.0 * sum(word in name for word in words) / len(words)
+    if substring_score == 100.0:
+        return substring_score
+
+    return max(substring_score, fuzz.token_set_ratio(query, name))
+
+
+class _PageFetchError(Exception):
+    """Raised by _iter_devices when a page request returns an error response."""
+
+    def __init__(self, response: Dict[str, Any]):
+        super().__init__(response.get("error"))
+        self.response = response
+
+
+async def _iter_devices(
+    per_page: int = 100, concurrency: int = 8, max_pages: int = 1000
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Stream every device in the account as (page, device) pairs, in page order.
+
+    Page 1 is fetched on its own; after that up to `concurrency` page requests are
+    kept in flight, so the generator itself buffers at most about
+    per_page * concurrency devices. Pages bypass the GET response cache; keeping
+    the devices is up to the caller. Pagination stops at the total page count
+    reported by the API, or, when no count is reported, after a short or empty
+    page. Closing the generator cancels outstanding requests.
+
+    Args:
+        per_page: Number of devices requested per page (default: 100)
+        concurrency: Maximum number of page requests in flight (default: 8)
+        max_pages: Safety limit on the number of pages fetched (default: 1000)
+
+    Raises:
+        _PageFetchError: If a page request returns an error response
+    """
+
+    async def fetch_page(page: int) -> Dict[str, Any]:
+        params = {"page": page, "per_page": per_page}
+        return await make_api_request("get", "/v1/devices", params=params, cache=False)
+
+    next_page = 1
+    last_page = max_pages
+    in_flight: Deque[Tuple[int, asyncio.Task]] = deque()
+
+    try:
+        while True:
+            # Fetch page 1 alone to learn the page count before fanning out
+            window = concurrency if next_page > 1 else 1
+            while len(in_flight) < window and next_page <= last_page:
+                task = asyncio.create_task(fetch_page(next_page))
+                in_flight.append((next_page, task))
+                next_page += 1
 
-    for word in search_words:
-        # Exact word match in device name
-        if word in name_lower:
-            score += 1.0
-        # Partial match (word contains search term or vice versa)
-        elif any(word in part or part in word for part in name_lower.split("_")):
-            score += 0.7
-        # Check if search word is a number and exists in device name
-        elif word.isdigit() and word in re.findall(r"\d+", name_lower):
-            score += 0.9
+            if not in_flight:
+                return
 
-    # Bonus for exact match
-    if search_lower == name_lower:
-        score = max_possible_score
+            page, task = in_flight.popleft()
+            response = await task
 
-    # Normalize score
-    return min(score / max_possible_score, 1.0) if max_possible_score > 0 else 0.0
+            if "error" in response:
+                raise _PageFetchError(response)
+
+            devices = response.get("devices", [])
+
+            # If no devices returned, we've reached the end
+            if not devices:
+                return
+
+            total_pages = response.get("meta", {}).get("total_pages")
+            if total_pages:
+                last_page = min(last_page, int(total_pages))
+            elif len(devices) < per_page:
+                # Without a page count a short page is the last one, so don't wait
+                # on an empty fetch. The API may cap page sizes, so a reported page
+                # count always wins.
+                last_page = min(last_page, page)
+
+            for device in devices:
+                yield page, device
+
+            if page >= last_page:
+                return
+    finally:
+        for _, task in in_flight:
+            task.cancel()
+
+
+class DeviceIndex:
+    """
+    In-memory snapshot of every device in the account for fast name lookups.
+
+    The raw device records are kept alongside a column of their normalized names,
+    so fuzzy matching only scans that column and results can return the matched
+    record unchanged. The index is
+    populated on first use and reloaded by the first lookup after it is more than
+    `refresh_interval` seconds old. Writes that change device names mark it stale
+    so the next lookup reloads it.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0):
+        self.names_processed: List[str] = []
+        self.records: List[Dict[str, Any]] = []
+        self.pages = 0
+        self._by_name: Dict[str, int] = {}
+        self._refresh_interval = refresh_interval
+        self._stale = True
+        self._generation = 0
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self) -> None:
+        """
+        Load the index if it is empty or stale, or reload it if it has expired.
+
+        Raises:
+            _PageFetchError: If a page request returns an error response while
+                the index is empty or stale
+        """
+        if not self._stale and not self._expired():
+            return
+
+        async with self._lock:
+            if self._stale:
+                await self.refresh()
+            elif self._expired():
+                try:
+                    await self.refresh()
+                except _PageFetchError:
+                    # Keep serving the previous snapshot until the next lookup
+                    pass
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self._refresh_interval
+
+    async def refresh(self) -> None:
+        """Re-fetch every device and swap in the new snapshot."""
+        generation = self._generation
+        devices = []
+        pages = 0
+        async with aclosing(_iter_devices()) as device_stream:
+            async for page, device in device_stream:
+                devices.append(device)
+                pages = page
+
+        self._load(devices, pages)
+
+        # An invalidate() during the fetch means these pages may predate the write
+        self._stale = self._generation != generation
+
+    def _load(self, devices: List[Dict[str, Any]], pages: int) -> None:
+        """Replace the snapshot with the given devices."""
+        names_processed = []
+        by_name: Dict[str, int] = {}
+
+        for i, device in enumerate(devices):
+            name = device.get("name") or ""
+            by_name.setdefault(name.lower(), i)
+            names_processed.append(utils.default_process(name))
+
+        self.names_processed = names_processed
+        self.records = devices
+        self.pages = pages
+        self._by_name = by_name
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Mark the index stale so the next lookup reloads it."""
+        self._generation += 1
+        self._stale = True
+
+    def find(
+        self, search: Tuple[str, str], min_score: float
+    ) -> Tuple[Optional[int], float]:
+        """
+        Find the device whose name best matches the search terms.
+
+        Args:
+            search: Preprocessed search terms from _prepare_search_terms
+            min_score: Minimum score (0-1) for a fuzzy match to be returned
+
+        Returns:
+            Tuple of the best matching device's position (or None) and its score between 0-1
+        """
+        search_lower, search_query = search
+
+        # Exact match (case insensitive)
+        i = self._by_name.get(search_lower)
+        if i is not None:
+            return i, 1.0
+
+        if not search_query:
+            return None, 0.0
+
+        match = process.extractOne(
+            search_query,
+            self.names_processed,
+            scorer=_match_score,
+            processor=None,
+            score_cutoff=min_score * 100,
+        )
+        if match is None:
+            return None, 0.0
+
+        _, score, i = match
+        return i, score / 100.0
+
+    def describe(self, i: int) -> Dict[str, Any]:
+        """Gather the result fields for the device at position i."""
+        device = self.records[i]
+        return {
+            "device": device,
+            "node_id": device.get("id"),
+            "name": device.get("name"),
+            "online": device.get("online"),
+            "last_heard": device.get("last_heard"),
+        }
+
+
+_device_index = DeviceIndex()
 
 
 async def find_device_by_name(device_name: Union[str, List[str]]) -> Dict[str, Any]:
     """
-    Find device(s) by name using fuzzy matching and return their node_ids without fetching all devices.
+    Find device(s) by name using fuzzy matching and return their node_ids.
 
     This function searches for device(s) using fuzzy matching to handle cases like:
     - "device 47 in lccmr project" matches "LCCMR_47"
     - "guadalupe" matches "Guadalupe_Station_01"
     - "lccmr 23" matches "LCCMR_Irrigation_23"
 
-    It searches in a paginated way to avoid loading the entire device list into memory.
+    Devices are looked up in an in-memory index that is loaded on first use and
+    reloaded once it expires, so repeated searches don't re-paginate the account.
 
     Args:
         device_name: The name/description of the device to search for, or a list of device names
@@ -166,62 +469,22 @@ async def find_device_by_name(device_name: Union[str, List[str]]) -> Dict[str, A
     for name in device_names:
         search_results[name] = {"best_match": None, "best_score": 0.0, "found": False}
 
-    page = 1
-    per_page = 100  # Use larger page size for efficiency
-    min_score_threshold = 0.3  # Minimum score to consider a match
-
-    while True:
-        # Get a page of devices
-        params = {"page": page, "per_page": per_page}
-        response = await make_api_request("get", "/v1/devices", params=params)
-
-        if "error" in response:
-            return response
-
-        devices = response.get("devices", [])
-
-        # If no devices returned, we've reached the end
-        if not devices:
-            break
-
-        # Search for devices in this page using fuzzy matching
-        for device in devices:
-            device_actual_name = device.get("name", "")
-
-            for search_name in device_names:
-                # Skip if we already found an exact match for this search name
-                if (
-                    search_results[search_name]["found"]
-                    and search_results[search_name]["best_score"] == 1.0
-                ):
-                    continue
-
-                # Try exact match first (case insensitive)
-                if device_actual_name.lower() == search_name.lower():
-                    search_results[search_name] = {
-                        "best_match": device,
-                        "best_score": 1.0,
-                        "found": True,
-                    }
-                    continue
-
-                # Calculate fuzzy match score
-                score = _fuzzy_match_score(search_name, device_actual_name)
-
-                if (
-                    score > search_results[search_name]["best_score"]
-                    and score >= min_score_threshold
-                ):
-                    search_results[search_name]["best_score"] = score
-                    search_results[search_name]["best_match"] = device
-                    search_results[search_name]["found"] = True
+    min_score_threshold = 0.5  # Minimum score to consider a match
 
-        # Move to next page
-        page += 1
+    try:
+        await _device_index.ensure_loaded()
+    except _PageFetchError as e:
+        return e.response
 
-        # Safety check to prevent infinite loops
-        if page > 1000:  # Arbitrary large number
-            break
+    searched_pages = _device_index.pages
+    for name in device_names:
+        i, score = _device_index.find(_prepare_search_terms(name), min_score_threshold)
+        if i is not None:
+            search_results[name] = {
+                "best_match": _device_index.describe(i),
+                "best_score": score,
+                "found": True,
+            }
 
     # Process results
     if return_single:
@@ -232,18 +495,14 @@ async def find_device_by_name(device_name: Union[str, List[str]]) -> Dict[str, A
         if result["found"] and result["best_score"] >= min_score_threshold:
             return {
                 "success": True,
-                "device": result["best_match"],
-                "node_id": result["best_match"].get("id"),
-                "name": result["best_match"].get("name"),
-                "online": result["best_match"].get("online"),
-                "last_heard": result["best_match"].get("last_heard"),
+                **result["best_match"],
                 "match_score": result["best_score"],
                 "match_type": "exact" if result["best_score"] == 1.0 else "fuzzy",
             }
 
         return {
-            "error": f"No device found matching '{search_name}' (searched {page - 1} pages)",
-            "searched_pages": page - 1,
+            "error": f"No device found matching '{search_name}' (searched {searched_pages} pages)",
+            "searched_pages": searched_pages,
             "best_score": result["best_score"],
         }
     else:
@@ -259,11 +518,7 @@ async def find_device_by_name(device_name: Union[str, List[str]]) -> Dict[str, A
                     {
                         "search_name": search_name,
                         "success": True,
-                        "device": result["best_match"],
-                        "node_id": result["best_match"].get("id"),
-                        "name": result["best_match"].get("name"),
-                        "online": result["best_match"].get("online"),
-                        "last_heard": result["best_match"].get("last_heard"),
+                        **result["best_match"],
                         "match_score": result["best_score"],
                         "match_type": (
                             "exact" if result["best_score"] == 1.0 else "fuzzy"
@@ -285,6 +540,6 @@ async def find_device_by_name(device_name: Union[str, List[str]]) -> Dict[str, A
             "total_searched": len(device_names),
             "found_count": len(devices_found),
             "not_found_count": len(devices_not_found),
-            "searched_pages": page - 1,
+            "searched_pages": searched_pages,
             "devices": devices_found + devices_not_found,
         }
@@ -1,7 +1,10 @@
 from typing import Any, Dict
 
+from endpoints.devices import ping_device
 from helpers.api_helpers import make_api_request
 
+__all__ = ["get_device_vitals", "ping_device"]
+
 
 async def get_device_vitals(device_id: str) -> Dict[str, Any]:
     """
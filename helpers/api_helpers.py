@@ -1,7 +1,14 @@
+import asyncio
 import os
-from typing import Any, Dict, Optional
+import random
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
 import httpx
+import orjson
+from cachetools import TTLCache
 
 # Constants
 PARTICLE_API_BASE = "https://api.particle.io"
@@ -13,6 +20,89 @@ if not ACCESS_TOKEN:
         "PARTICLE_ACCESS_TOKEN environment variable is not set. Please add it to your .env file."
     )
 
+# Shared client so every request reuses pooled keep-alive connections and the
+# authorization header built once here. It is created on first use and closed
+# when the last server session ends.
+_client: Optional[httpx.AsyncClient] = None
+_active_sessions = 0
+
+# Cap on concurrent requests so parallel pagination stays under Particle's rate limit
+MAX_CONCURRENCY = os.getenv("PARTICLE_MAX_CONCURRENCY", "8").strip()
+if not MAX_CONCURRENCY.isdecimal() or int(MAX_CONCURRENCY) < 1:
+    raise EnvironmentError(
+        f"PARTICLE_MAX_CONCURRENCY must be a whole number of at least 1, got {MAX_CONCURRENCY!r}. Please fix it in your .env file."
+    )
+_request_semaphore = asyncio.Semaphore(int(MAX_CONCURRENCY))
+
+# Retries for rate-limited (429) and server error (5xx) responses
+_MAX_RETRIES = 3
+_RETRY_BACKOFF = 0.5  # Base delay in seconds, doubled on each attempt
+_MAX_RETRY_DELAY = 30.0
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Short-lived cache of successful GET responses, keyed on (endpoint, params)
+_response_cache: TTLCache = TTLCache(maxsize=512, ttl=30)
+_cache_locks: Dict[Tuple, asyncio.Lock] = {}
+
+# Invalidation counter, and the count at which each path prefix was last invalidated
+_invalidation_count = 0
+_invalidated_at: Dict[str, int] = {}
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it if it is missing or closed."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=PARTICLE_API_BASE,
+            headers={"Authorization": f"Bearer {ACCESS_TOKEN}"},
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=50,
+                keepalive_expiry=60.0,
+            ),
+            http2=True,
+            timeout=httpx.Timeout(10.0, connect=3.0),
+        )
+    return _client
+
+
+@asynccontextmanager
+async def client_session() -> AsyncIterator[None]:
+    """Keep the shared HTTP client open for the duration of a server session.
+
+    Transports such as SSE run one session per connection, so the client and its
+    pooled connections are only closed once the last active session ends.
+    """
+    global _active_sessions
+    _active_sessions += 1
+    try:
+        yield
+    finally:
+        _active_sessions -= 1
+        if _active_sessions == 0 and _client is not None:
+            await _client.aclose()
+
+
+def invalidate(path_prefix: str):
+    """Drop cached GET responses for endpoints starting with path_prefix."""
+    global _invalidation_count
+    _invalidation_count += 1
+    _invalidated_at[path_prefix] = _invalidation_count
+
+    for key in list(_response_cache.keys()):
+        if key[0].startswith(path_prefix):
+            _response_cache.pop(key, None)
+
+
+def _invalidated_since(endpoint: str, count: int) -> bool:
+    """Check whether endpoint was invalidated after the given invalidation count."""
+    return any(
+        invalidated > count and endpoint.startswith(prefix)
+        for prefix, invalidated in _invalidated_at.items()
+    )
+
 
 async def make_api_request(
     method: str,
@@ -20,43 +110,120 @@ async def make_api_request(
     headers: Optional[Dict] = None,
     json_data: Optional[Dict] = None,
     params: Optional[Dict] = None,
+    cache: bool = True,
 ):
-    """Make an API request to the Particle API with proper error handling."""
-    if headers is None:
-        headers = {}
+    """Make an API request to the Particle API with proper error handling.
 
-    # Add authorization header if not present
-    if "Authorization" not in headers:
-        headers["Authorization"] = f"Bearer {ACCESS_TOKEN}"
+    Successful GET responses are cached briefly, and concurrent identical GETs
+    share a single request. Pass cache=False to always go to the API.
+    """
+    if method.lower() != "get" or headers is not None or not cache:
+        return await _send_request(method, endpoint, headers, json_data, params)
 
-    async with httpx.AsyncClient() as client:
+    key = (endpoint, tuple(sorted((params or {}).items())))
+    cached = _response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    lock = _cache_locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            # Another caller may have filled the cache while we waited
+            cached = _response_cache.get(key)
+            if cached is not None:
+                return cached
+
+            count = _invalidation_count
+            response = await _send_request(method, endpoint, headers, json_data, params)
+
+            # Don't cache a response that a write made stale while it was in flight
+            if "error" not in response and not _invalidated_since(endpoint, count):
+                _response_cache[key] = response
+            return response
+    finally:
+        # Waiters keep their own reference, so the lock can be dropped right away
+        if _cache_locks.get(key) is lock:
+            del _cache_locks[key]
+
+
+async def _send_request(
+    method: str,
+    endpoint: str,
+    headers: Optional[Dict] = None,
+    json_data: Optional[Dict] = None,
+    params: Optional[Dict] = None,
+):
+    """Send a single request to the Particle API without caching."""
+    # Encode request bodies with orjson rather than httpx's stdlib json
+    content = None
+    if json_data is not None:
+        content = orjson.dumps(json_data)
+        headers = {**_JSON_HEADERS, **headers} if headers else _JSON_HEADERS
+
+    method = method.lower()
+    if method not in ("get", "post", "put", "delete"):
+        return {"error": f"Unsupported HTTP method: {method}"}
+
+    client = _get_client()
+    try:
+        for attempt in range(_MAX_RETRIES + 1):
+            async with _request_semaphore:
+                if method == "get":
+                    response = await client.get(
+                        endpoint, headers=headers, params=params
+                    )
+                elif method == "post":
+                    response = await client.post(
+                        endpoint, headers=headers, content=content
+                    )
+                elif method == "put":
+                    response = await client.put(
+                        endpoint, headers=headers, content=content
+                    )
+                else:
+                    response = await client.delete(endpoint, headers=headers)
+
+            # Retry rate-limited requests, and server errors on idempotent methods
+            retryable = response.status_code == 429 or (
+                response.status_code >= 500 and method != "post"
+            )
+            if not retryable or attempt == _MAX_RETRIES:
+                break
+
+            # Back off outside the semaphore so other requests can proceed
+            await asyncio.sleep(_retry_delay(response, attempt))
+
+        # Check if the response was successful
+        if response.status_code >= 200 and response.status_code < 300:
+            return (
+                orjson.loads(response.content)
+                if response.content
+                else {"status": "success"}
+            )
+        else:
+            return {
+                "error": f"API request failed with status code: {response.status_code}",
+                "message": response.text,
+            }
+    except Exception as e:
+        return {"error": f"Error making API request: {str(e)}"}
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying, honoring Retry-After when present."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
         try:
-            if method.lower() == "get":
-                response = await client.get(
-                    f"{PARTICLE_API_BASE}{endpoint}", headers=headers, params=params
-                )
-            elif method.lower() == "post":
-                response = await client.post(
-                    f"{PARTICLE_API_BASE}{endpoint}", headers=headers, json=json_data
-                )
-            elif method.lower() == "put":
-                response = await client.put(
-                    f"{PARTICLE_API_BASE}{endpoint}", headers=headers, json=json_data
-                )
-            elif method.lower() == "delete":
-                response = await client.delete(
-                    f"{PARTICLE_API_BASE}{endpoint}", headers=headers
-                )
-            else:
-                return {"error": f"Unsupported HTTP method: {method}"}
-
-            # Check if the response was successful
-            if response.status_code >= 200 and response.status_code < 300:
-                return response.json() if response.content else {"status": "success"}
-            else:
-                return {
-                    "error": f"API request failed with status code: {response.status_code}",
-                    "message": response.text,
-                }
-        except Exception as e:
-            return {"error": f"Error making API request: {str(e)}"}
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0.0), _MAX_RETRY_DELAY)
+
+    # Exponential backoff with jitter
+    backoff = _RETRY_BACKOFF * 2**attempt
+    return min(backoff + random.uniform(0, backoff), _MAX_RETRY_DELAY)
@@ -1,16 +1,41 @@
-from typing import Any, Dict, List, Optional, Union
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
-# Load environment variables
-load_dotenv()
+# Use uvloop's faster event loop where available (it doesn't support Windows).
+# Event loop policies are deprecated from Python 3.14, and uvloop.EventLoopPolicy
+# goes away with them in 3.16, so newer Pythons keep the default loop.
+if sys.version_info < (3, 14):
+    try:
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+# Load environment variables, skipping .env if the token is already set
+if not os.environ.get("PARTICLE_ACCESS_TOKEN"):
+    load_dotenv()
 
 # Import all endpoint modules
 from endpoints import devices, diagnostics, organizations, product_firmware
+from helpers.api_helpers import client_session
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Hold the shared Particle API client open while a session is running."""
+    async with client_session():
+        yield
+
 
 # Initialize FastMCP server
-mcp = FastMCP("particle")
+mcp = FastMCP("particle", lifespan=lifespan)
 
 
 # -----------------
@@ -61,6 +86,23 @@ async def add_device_notes(device_id: str, notes: str) -> Dict[str, Any]:
     return await devices.add_device_notes(device_id, notes)
 
 
+@mcp.tool("update_device")
+async def update_device(
+    device_id: str, name: Optional[str] = None, notes: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Update a device's name and/or notes in a single request. Use this instead of calling
+    rename_device and add_device_notes separately when both need to change.
+    Renaming only affects the name and not the node-id, and should only be done if explicitly asked for.
+
+    Args:
+        device_id: The ID of the device
+        name: The new name for the device (optional)
+        notes: The notes to add to the device (optional)
+    """
+    return await devices.update_device(device_id, name=name, notes=notes)
+
+
 @mcp.tool("ping_device")
 async def ping_device(device_id: str) -> Dict[str, Any]:
     """Ping a device to check if it's online. This sould only ever be called if specifically asked for."""
@@ -86,12 +128,12 @@ async def call_function(
 @mcp.tool("find_device_by_name")
 async def find_device_by_name(device_name: Union[str, List[str]]) -> Dict[str, Any]:
     """
-    Find device(s) by name using fuzzy matching and return their node_ids without fetching all devices.
+    Find device(s) by name using fuzzy matching and return their node_ids.
 
     This function efficiently searches for device(s) using fuzzy matching to handle natural language
     queries like "device 47 in lccmr project" → "LCCMR_47" or "guadalupe" → "Guadalupe_Station_01".
-    Uses pagination to avoid loading the entire device list into memory. Use this instead of
-    list_devices when you need to find specific device node_ids.
+    Uses a cached device index that is reloaded once it expires, so repeated searches are fast. Use this
+    instead of list_devices when you need to find specific device node_ids.
 
     Args:
         device_name: The name/description of the device to search for, or a list of device names (supports fuzzy matching)
@@ -0,0 +1,48 @@
+import asyncio
+import os
+from collections import defaultdict
+
+import httpx
+import pytest
+from cachetools import TTLCache
+
+os.environ.setdefault("PARTICLE_ACCESS_TOKEN", "test-token")
+
+from endpoints import devices
+from helpers import api_helpers
+
+
+class FakeParticleAPI:
+    """Records requests sent to the Particle API and answers them with `handler`."""
+
+    def __init__(self):
+        self.requests = []
+        self.handler = lambda request: httpx.Response(200, json={})
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = self.handler(request)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+    def sent(self, method: str, path: str):
+        return [r for r in self.requests if r.method == method and r.url.path == path]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Route API requests to a FakeParticleAPI and reset module-level state."""
+    fake = FakeParticleAPI()
+    client = httpx.AsyncClient(
+        base_url=api_helpers.PARTICLE_API_BASE, transport=httpx.MockTransport(fake)
+    )
+    monkeypatch.setattr(api_helpers, "_client", client)
+    monkeypatch.setattr(api_helpers, "_response_cache", TTLCache(maxsize=512, ttl=30))
+    monkeypatch.setattr(api_helpers, "_cache_locks", {})
+    monkeypatch.setattr(api_helpers, "_invalidated_at", {})
+    monkeypatch.setattr(api_helpers, "_request_semaphore", asyncio.Semaphore(8))
+    monkeypatch.setattr(devices, "_device_index", devices.DeviceIndex())
+    monkeypatch.setattr(devices, "_pending_updates", defaultdict(dict))
+    monkeypatch.setattr(devices, "_pending_flushes", {})
+    return fake
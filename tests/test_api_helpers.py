@@ -0,0 +1,98 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import httpx
+import pytest
+
+from helpers import api_helpers
+
+
+@pytest.mark.parametrize("value", ["abc", "0", "-2", "2.5", ""])
+def test_invalid_max_concurrency_raises(value):
+    env = {**os.environ, "PARTICLE_MAX_CONCURRENCY": value}
+    result = subprocess.run(
+        [sys.executable, "-c", "import helpers.api_helpers"],
+        cwd=Path(__file__).parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode != 0
+    # EnvironmentError is an alias of OSError
+    assert "OSError: PARTICLE_MAX_CONCURRENCY must be a whole number" in result.stderr
+
+
+def retry_after(value: str) -> httpx.Response:
+    return httpx.Response(429, headers={"Retry-After": value})
+
+
+def test_retry_delay_honors_retry_after_seconds():
+    assert api_helpers._retry_delay(retry_after("7"), attempt=0) == 7.0
+
+
+def test_retry_delay_honors_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=10)
+
+    delay = api_helpers._retry_delay(retry_after(format_datetime(retry_at)), 0)
+
+    assert 8.0 <= delay <= 10.0
+
+
+def test_retry_delay_is_capped():
+    assert api_helpers._retry_delay(retry_after("3600"), attempt=0) == 30.0
+    assert api_helpers._retry_delay(httpx.Response(503), attempt=20) == 30.0
+
+
+@pytest.mark.parametrize("attempt", [0, 1, 2])
+@pytest.mark.parametrize("response", [httpx.Response(503), retry_after("soon")])
+def test_retry_delay_backs_off_exponentially_with_jitter(response, attempt):
+    backoff = api_helpers._RETRY_BACKOFF * 2**attempt
+
+    delay = api_helpers._retry_delay(response, attempt)
+
+    assert backoff <= delay <= 2 * backoff
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(api_helpers, "_RETRY_BACKOFF", 0)
+
+
+def test_rate_limited_request_is_retried(api, no_backoff):
+    responses = iter([retry_after("0"), httpx.Response(200, json={"devices": []})])
+    api.handler = lambda request: next(responses)
+
+    result = asyncio.run(api_helpers.make_api_request("get", "/v1/devices"))
+
+    assert result == {"devices": []}
+    assert len(api.sent("GET", "/v1/devices")) == 2
+
+
+def test_post_is_not_retried_on_server_error(api, no_backoff):
+    api.handler = lambda request: httpx.Response(503)
+
+    result = asyncio.run(
+        api_helpers.make_api_request(
+            "post", "/v1/devices/abc/reset", json_data={"arg": ""}
+        )
+    )
+
+    assert "error" in result
+    assert len(api.sent("POST", "/v1/devices/abc/reset")) == 1
+
+
+def test_put_is_retried_on_server_error(api, no_backoff):
+    api.handler = lambda request: httpx.Response(503)
+
+    result = asyncio.run(
+        api_helpers.make_api_request("put", "/v1/devices/abc", json_data={"name": "x"})
+    )
+
+    assert "error" in result
+    assert len(api.sent("PUT", "/v1/devices/abc")) == api_helpers._MAX_RETRIES + 1
@@ -0,0 +1,64 @@
+import pytest
+
+from endpoints.devices import DeviceIndex, _prepare_search_terms
+
+DEVICE_NAMES = [
+    "LCCMR_1",
+    "LCCMR_47",
+    "LCCMR_Irrigation_23",
+    "Guadalupe_Station_01",
+    "SoilMoisture_Unit_5",
+]
+
+
+@pytest.fixture
+def index():
+    index = DeviceIndex()
+    devices = [
+        {"id": f"id{i}", "name": name, "online": True, "last_heard": None}
+        for i, name in enumerate(DEVICE_NAMES)
+    ]
+    index._load(devices, pages=1)
+    return index
+
+
+# Queries the original word/substring scorer matched, with the device it picked
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("LCCMR_47", "LCCMR_47"),
+        ("device 47 in lccmr project", "LCCMR_47"),
+        ("lccmr 23", "LCCMR_Irrigation_23"),
+        ("guadalupe", "Guadalupe_Station_01"),
+        ("guad", "Guadalupe_Station_01"),
+        ("soil", "SoilMoisture_Unit_5"),
+        ("irrig", "LCCMR_Irrigation_23"),
+    ],
+)
+def test_find_matches_baseline_queries(index, query, expected):
+    i, score = index.find(_prepare_search_terms(query), min_score=0.5)
+
+    assert i is not None
+    assert index.records[i]["name"] == expected
+    assert score >= 0.5
+
+
+@pytest.mark.parametrize("query", ["nothing here", "weather", "the device"])
+def test_find_rejects_unrelated_queries(index, query):
+    i, score = index.find(_prepare_search_terms(query), min_score=0.5)
+
+    assert i is None
+    assert score == 0.0
+
+
+def test_describe_reads_fields_from_the_device_record():
+    index = DeviceIndex()
+    index._load([{"id": "id0", "name": "LCCMR_1"}], pages=1)
+
+    assert index.describe(0) == {
+        "device": {"id": "id0", "name": "LCCMR_1"},
+        "node_id": "id0",
+        "name": "LCCMR_1",
+        "online": None,
+        "last_heard": None,
+    }
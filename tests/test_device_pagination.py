@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+
+from endpoints import devices
+
+
+def paged_devices(total: int, page_size: int, report_total_pages: bool):
+    """Build a handler serving DEV_0..DEV_{total-1}, page_size devices per page."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        start = (page - 1) * page_size
+        body = {
+            "devices": [
+                {"id": f"id{i}", "name": f"DEV_{i}"}
+                for i in range(start, min(start + page_size, total))
+            ]
+        }
+        if report_total_pages:
+            body["meta"] = {"total_pages": -(-total // page_size)}
+        return httpx.Response(200, json=body)
+
+    return handler
+
+
+async def collect_devices():
+    return [device async for _, device in devices._iter_devices(per_page=100)]
+
+
+def test_iter_devices_trusts_total_pages_over_short_pages(api):
+    # The API caps pages at 25 devices even though 100 were requested
+    api.handler = paged_devices(250, page_size=25, report_total_pages=True)
+
+    found = asyncio.run(collect_devices())
+
+    assert len(found) == 250
+    assert len(api.sent("GET", "/v1/devices")) == 10
+
+
+def test_iter_devices_stops_at_short_page_without_total_pages(api):
+    api.handler = paged_devices(250, page_size=100, report_total_pages=False)
+
+    found = asyncio.run(collect_devices())
+
+    assert len(found) == 250
+    pages = sorted(int(r.url.params["page"]) for r in api.sent("GET", "/v1/devices"))
+    assert pages[:3] == [1, 2, 3]
+
+
+def test_find_device_by_name_searches_every_capped_page(api):
+    api.handler = paged_devices(250, page_size=25, report_total_pages=True)
+
+    result = asyncio.run(devices.find_device_by_name("DEV_200"))
+
+    assert result["name"] == "DEV_200"
+    assert result["match_type"] == "exact"
+
+
+def test_device_index_reloads_lazily_once_expired(api):
+    list_pages = paged_devices(3, page_size=25, report_total_pages=True)
+    api.handler = lambda request: (
+        httpx.Response(200, json={"online": True})
+        if request.method == "PUT"
+        else list_pages(request)
+    )
+
+    async def scenario():
+        await devices.find_device_by_name("DEV_1")
+        # Pings don't change names, so they shouldn't force a reload
+        await devices.ping_device("id1")
+        await devices.find_device_by_name("DEV_1")
+        first_load = len(api.sent("GET", "/v1/devices"))
+
+        devices._device_index._loaded_at -= devices._device_index._refresh_interval
+        await devices.find_device_by_name("DEV_1")
+        return first_load
+
+    first_load = asyncio.run(scenario())
+
+    assert first_load == 1
+    assert len(api.sent("GET", "/v1/devices")) == 2
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from endpoints import devices
+
+
+def test_device_write_invalidates_product_device_listings(api):
+    api.handler = lambda request: httpx.Response(200, json={"devices": []})
+
+    async def scenario():
+        await devices.list_product_devices("1234")
+        await devices.rename_device("abc", "Renamed")
+        await devices.list_product_devices("1234")
+
+    asyncio.run(scenario())
+
+    assert len(api.sent("GET", "/v1/products/1234/devices")) == 2
+
+
+def put_bodies(api, device_id):
+    return [json.loads(r.content) for r in api.sent("PUT", f"/v1/devices/{device_id}")]
+
+
+def test_rename_and_notes_fold_into_one_put(api):
+    async def scenario():
+        return await asyncio.gather(
+            devices.rename_device("abc", "Station_1"),
+            devices.add_device_notes("abc", "Moved to field 2"),
+        )
+
+    asyncio.run(scenario())
+
+    assert put_bodies(api, "abc") == [
+        {"name": "Station_1", "notes": "Moved to field 2"}
+    ]
+
+
+def test_later_value_wins_for_the_same_field(api):
+    async def scenario():
+        return await asyncio.gather(
+            devices.rename_device("abc", "First"),
+            devices.rename_device("abc", "Second"),
+        )
+
+    asyncio.run(scenario())
+
+    assert put_bodies(api, "abc") == [{"name": "Second"}]
+
+
+def test_write_during_in_flight_put_starts_a_new_flush(api):
+    put_started = asyncio.Event()
+
+    async def slow_put(request):
+        put_started.set()
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"ok": True})
+
+    api.handler = slow_put
+
+    async def scenario():
+        rename = asyncio.create_task(devices.rename_device("abc", "Station_1"))
+        await put_started.wait()
+        notes = await devices.add_device_notes("abc", "Moved to field 2")
+        await rename
+        return notes
+
+    asyncio.run(scenario())
+
+    assert put_bodies(api, "abc") == [
+        {"name": "Station_1"},
+        {"notes": "Moved to field 2"},
+    ]
+
+
+def test_device_update_invalidates_cache_and_index(api):
+    index = devices._device_index
+    index._stale = False
+
+    async def scenario():
+        await devices.list_devices()
+        await devices.update_device("abc", name="Station_1")
+        await devices.list_devices()
+
+    asyncio.run(scenario())
+
+    assert len(api.sent("GET", "/v1/devices")) == 2
+    assert index._stale
+
+
+def test_cancelled_flush_does_not_block_later_updates(api):
+    async def scenario():
+        # One flush cancelled mid-sleep, another before it ever ran
+        for settle in (0.001, 0):
+            pending = asyncio.create_task(devices.rename_device("abc", "Lost"))
+            await asyncio.sleep(settle)
+            devices._pending_flushes["abc"].cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await pending
+
+        return await devices.rename_device("abc", "Station_1")
+
+    result = asyncio.run(scenario())
+
+    assert "error" not in result
+    assert put_bodies(api, "abc") == [{"name": "Station_1"}]
+    assert devices._pending_flushes == {}